@@ -3,6 +3,17 @@ from typing import List
 from .models import ProductVariant, ProductContext
 
 class BusinessRules:
+
+    OFF_TOPIC_TEMPLATE = (
+        "I am the AI assistant for {brand_name} only.\n"
+        "I cannot provide information about other brands, platforms, or unrelated topics."
+    )
+
+    COMPETITOR_TRIGGERS = [
+        r"amazon", r"flipkart", r"myntra", r"nykaa", r"aliexpress", 
+        r"ebay", r"walmart", r"sephora", r"body shop", r"burt's bees",
+        r"now foods", r"gnc", r"nature's bounty"
+    ]
     
     # ---------------------------------------------------------
     # 1. STOCK AVAILABILITY RULES
@@ -43,12 +54,7 @@ class BusinessRules:
         Detects queries about competitors, revenue, or general knowledge 
         that should be refused.
         """
-        triggers = [
-            # Competitors / Marketplaces
-            r"amazon", r"flipkart", r"myntra", r"nykaa", r"aliexpress", 
-            r"ebay", r"walmart", r"sephora", r"body shop", r"burt's bees",
-            r"now foods", r"gnc", r"nature's bounty",
-            
+        triggers = BusinessRules.COMPETITOR_TRIGGERS + [
             # Business / Corporate
             r"revenue", r"stock price", r"market cap", r"profit", 
             r"headquarters", r"ceo", r"founder", r"employees",
@@ -60,8 +66,91 @@ class BusinessRules:
         pattern = "|".join(triggers)
         return bool(re.search(pattern, query.lower()))
 
+    @staticmethod
+    def is_competitor_query(query: str) -> bool:
+        """
+        Strict subset of is_off_topic_query: whole-word competitor / marketplace
+        names only. Safe to refuse without the model.
+        """
+        pattern = r"\b(?:" + "|".join(BusinessRules.COMPETITOR_TRIGGERS) + r")\b"
+        return bool(re.search(pattern, query.lower()))
+
+    # ---------------------------------------------------------
+    # 4. LIVE DATA RULES
+    # ---------------------------------------------------------
+    @staticmethod
+    def is_stock_query(query: str) -> bool:
+        triggers = [
+            r"stock", r"available", r"availability", r"sold out", r"inventory",
+            r"\bleft\b", r"restock", r"back in"
+        ]
+        pattern = "|".join(triggers)
+        return bool(re.search(pattern, query.lower()))
+
+    @staticmethod
+    def is_price_query(query: str) -> bool:
+        triggers = [r"price", r"cost", r"how much", r"\brate\b", r"mrp", r"\brs\b", r"₹"]
+        pattern = "|".join(triggers)
+        return bool(re.search(pattern, query.lower()))
+
+    @staticmethod
+    def is_stock_or_price_query(query: str) -> bool:
+        """Detects questions whose answer depends on current stock or price."""
+        return BusinessRules.is_stock_query(query) or BusinessRules.is_price_query(query)
+
+    # Strict patterns for answers that skip the LLM entirely. The loose triggers
+    # above are fine as a refresh hint; these must not fire on "how much serum
+    # should I apply" or "what's available for oily skin".
+    @staticmethod
+    def is_direct_stock_question(query: str) -> bool:
+        """'is X in stock?', 'are they available?', 'do you have X in stock?'"""
+        q = query.lower().strip()
+        patterns = [
+            r"^(is|are)\b.*\b(in stock|available|sold out|out of stock)\s*[?.!]*$",
+            r"^(do|does) (you|u) (still )?have\b.*\bin stock\s*[?.!]*$"
+        ]
+        return any(re.search(p, q) for p in patterns)
+
+    @staticmethod
+    def is_direct_price_question(query: str) -> bool:
+        """'price of X', 'what is the price', 'how much does X cost', 'X price?'"""
+        q = query.lower().strip()
+        if re.search(r"shipping|delivery|courier|\bcod\b|return|refund|tax|customs", q):
+            return False
+        patterns = [
+            r"\b(price|cost|mrp) of\b",
+            r"\bwhat(?:'s| is) the (price|cost|mrp)\b",
+            r"\bhow much (does|do|is|are|will)\b.*\b(cost|costs|priced|price)\b",
+            r"\b(price|mrp)\s*[?.!]*$"
+        ]
+        return any(re.search(p, q) for p in patterns)
+
+    @staticmethod
+    def mentions_variant(query: str) -> bool:
+        """Sizes / shades / pack options - product-level stock and price can't answer these."""
+        pattern = (
+            r"\b(size|sizes|variant|variants|shade|shades|colou?rs?|flavou?rs?|scents?|"
+            r"pack of|refill|travel size|mini)\b|\b\d+\s?(ml|g|gm|gms|grams?|kg|l|ltr|oz)\b"
+        )
+        return bool(re.search(pattern, query.lower()))
+
+    @staticmethod
+    def is_contact_query(query: str) -> bool:
+        """Detects requests for the store's support email / phone (intent phrasing, not bare words)."""
+        triggers = [
+            r"\bcontact (you|u|us|support|the team|customer (care|support|service))\b",
+            r"\b(phone|contact|mobile|whatsapp|helpline|support|customer (care|service)) (number|no)\b",
+            r"\b(support|customer (care|support|service)|your|contact) (e-?mail|mail id|phone)\b",
+            r"\be-?mail (id|address)\b",
+            r"\bhow (can|do) i (reach|contact|call|email|e-mail) (you|u|support|the team)\b",
+            r"\b(reach|call|email|e-mail) (you|u) (guys|at|on)\b",
+            r"\btalk to (someone|a human|a person|support|customer (care|support|service))\b"
+        ]
+        pattern = "|".join(triggers)
+        return bool(re.search(pattern, query.lower()))
+
     # ---------------------------------------------------------
-    # 4. PRODUCT PRIORITIZATION RULES
+    # 5. PRODUCT PRIORITIZATION RULES
     # ---------------------------------------------------------
     @staticmethod
     def sort_products_for_context(products: List[ProductContext], query: str) -> List[ProductContext]:
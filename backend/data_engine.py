@@ -7,7 +7,7 @@ from .models import ProductContext, ProductVariant
 from .shopify_client import ShopifyClient
 
 class MultiTenantDataEngine:
-    def __init__(self):
+    def __init__(self, use_live_api: bool = True):
         self.brand_datasets: Dict[str, pd.DataFrame] = {}
         self.shopify_clients: Dict[str, ShopifyClient] = {}
         self.live_cache: Dict[str, List[ProductContext]] = {}
@@ -39,6 +39,10 @@ class MultiTenantDataEngine:
             "skin": ["wash", "serum", "moisturizer", "sunscreen", "body"],
             "clean": ["wash", "cleanser", "soap", "bar"]
         }
+        # Relevance weights for a search term hit in the title / tags
+        self.TITLE_WEIGHT = 10
+        self.TAG_WEIGHT = 5
+        self.use_live_api = use_live_api
         self._initialize_sources()
 
     def _initialize_sources(self):
@@ -47,7 +51,7 @@ class MultiTenantDataEngine:
             domain = os.getenv(meta.get("shop_domain_env", ""))
             
             # API Initialization
-            if api_key and domain:
+            if api_key and domain and self.use_live_api:
                 try:
                     print(f"🔌 Connecting to Shopify Live API for {brand}...")
                     client = ShopifyClient(domain, api_key)
@@ -83,6 +87,17 @@ class MultiTenantDataEngine:
         """Returns cached shop details (email, phone, etc)"""
         return self.shop_info_cache.get(brand_id, {})
 
+    def refresh_inventory(self, brand_id: str, products: List[ProductContext], limit: int = 3) -> List[ProductContext]:
+        """Overlays live stock/price on the top `limit` products (live brands only)."""
+        client = self.shopify_clients.get(brand_id)
+        if client is None or not products:
+            return products
+        try:
+            return client.refresh_products(products[:limit]) + products[limit:]
+        except Exception as e:
+            print(f"⚠️ Live inventory refresh failed for {brand_id}: {e}")
+            return products
+
     # ... [Rest of the file: _load_csv, _clean_html, search_products, etc. remains UNCHANGED] ...
     # (Reuse the robust search logic from the previous step)
     def _load_csv(self, brand, filepath):
@@ -123,14 +138,17 @@ class MultiTenantDataEngine:
         
         individual = [p for p in products if not self._is_kit(p.title)]
         selected = (individual + products)[:limit]
-        for p in selected: p.match_quality = "fallback"
-        return selected
+        return self._with_quality(selected, "fallback")
 
     def _get_sale_products(self, brand_id: str, limit: int = 5) -> List[ProductContext]:
         if brand_id in self.live_cache:
             return [p for p in self.live_cache[brand_id] if "ON SALE" in p.price_range][:limit]
         return self._get_featured_products(brand_id)
 
+    def _with_quality(self, products: List[ProductContext], quality: str) -> List[ProductContext]:
+        # Copies: live_cache objects are shared across concurrent /chat and /prefetch searches
+        return [p.copy(update={"match_quality": quality}) for p in products]
+
     def _expand_query(self, query_tokens: List[str]) -> List[str]:
         expanded = set(query_tokens)
         for token in query_tokens:
@@ -141,32 +159,24 @@ class MultiTenantDataEngine:
     def search_products(self, brand_id: str, query: str, last_handle: Optional[str] = None) -> List[ProductContext]:
         raw_query = query.lower().strip()
         if any(k in raw_query for k in self.PROMO_INTENTS):
-            results = self._get_sale_products(brand_id)
-            for p in results: p.match_quality = "direct"
-            return results
+            return self._with_quality(self._get_sale_products(brand_id), "direct")
         if last_handle and any(k in raw_query for k in self.CONTEXT_INTENTS) and len(raw_query.split()) < 6:
             if brand_id in self.live_cache:
                 p = next((x for x in self.live_cache[brand_id] if x.handle == last_handle), None)
                 if p: 
-                    p.match_quality = "direct"
-                    return [p]
+                    return self._with_quality([p], "direct")
             else:
                 p = self.get_product_by_handle_csv(brand_id, last_handle)
                 if p: 
-                    p.match_quality = "direct"
-                    return [p]
+                    return self._with_quality([p], "direct")
         generic_keywords = ['products', 'catalog', 'list', 'show me', 'what do you have', 'collection', 'offer']
         if (any(k in raw_query for k in generic_keywords) and len(raw_query.split()) < 10) or raw_query in ["products", "all products"]:
-            results = self._get_featured_products(brand_id)
-            for p in results: p.match_quality = "catalog"
-            return results
+            return self._with_quality(self._get_featured_products(brand_id), "catalog")
         tokens = [w for w in raw_query.split() if w not in self.STOP_WORDS and w not in self.CONTEXT_INTENTS]
         search_terms = self._expand_query(tokens)
         cleaned_query = "".join(tokens)
         if not cleaned_query: 
-            results = self._get_featured_products(brand_id)
-            for p in results: p.match_quality = "catalog"
-            return results
+            return self._with_quality(self._get_featured_products(brand_id), "catalog")
         results = []
         if brand_id in self.live_cache:
             candidates = []
@@ -175,8 +185,8 @@ class MultiTenantDataEngine:
                 norm_title = self._normalize_text(p.title)
                 norm_tags = self._normalize_text(" ".join(p.tags))
                 for term in search_terms:
-                    if term in norm_title: score += 10
-                    if term in norm_tags: score += 5
+                    if term in norm_title: score += self.TITLE_WEIGHT
+                    if term in norm_tags: score += self.TAG_WEIGHT
                 if score > 0: candidates.append((score, p))
             candidates.sort(key=lambda x: x[0], reverse=True)
             results = [x[1] for x in candidates]
@@ -184,24 +194,25 @@ class MultiTenantDataEngine:
             df = self.brand_datasets.get(brand_id)
             if df is not None:
                 unique_products = df.groupby('Handle').first().reset_index()
-                unique_products['norm_text'] = unique_products['Title'].apply(self._normalize_text) + " " + unique_products['Tags'].apply(self._normalize_text)
-                matches = pd.DataFrame()
+                norm_titles = unique_products['Title'].apply(self._normalize_text)
+                norm_tags = unique_products['Tags'].apply(self._normalize_text)
+                # Same weighted scoring as the live branch
+                scores = pd.Series(0, index=unique_products.index)
                 for term in search_terms:
-                    matches = pd.concat([matches, unique_products[unique_products['norm_text'].str.contains(term)]])
+                    scores += norm_titles.str.contains(term, regex=False) * self.TITLE_WEIGHT
+                    scores += norm_tags.str.contains(term, regex=False) * self.TAG_WEIGHT
+                matches = unique_products[scores > 0].assign(score=scores[scores > 0])
                 if not matches.empty:
-                    matches = matches.drop_duplicates(subset=['Handle'])
+                    matches = matches.sort_values('score', ascending=False, kind='stable')
                     for handle in matches['Handle'].head(5):
                         p = self.get_product_by_handle_csv(brand_id, handle)
                         if p: results.append(p)
         if results:
-            for p in results: p.match_quality = "direct"
             if not self._is_kit(raw_query):
                 results.sort(key=lambda p: self._is_kit(p.title))
-            return results[:4]
+            return self._with_quality(results[:4], "direct")
         else:
-            fallback_results = self._get_featured_products(brand_id)
-            for p in fallback_results: p.match_quality = "fallback"
-            return fallback_results
+            return self._get_featured_products(brand_id)
 
     def _is_kit(self, title: str) -> bool:
         kit_keywords = ['ritual', 'kit', 'set', 'bundle', 'combo', 'pack']
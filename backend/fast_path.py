@@ -0,0 +1,176 @@
+import re
+import threading
+from typing import List, Dict, Any, Optional
+from .models import ProductContext
+from .business_rules import BusinessRules
+
+class FastPathResponder:
+    """
+    Template answers for intents fully covered by structured data
+    (stock, price, support contact, off-topic refusal). Runs after search;
+    returns None whenever free-form generation is needed.
+    """
+
+    MAX_QUERY_WORDS = 12
+    MAX_LISTED_PRODUCTS = 3
+    # Question scaffolding ignored when checking that a product title covers the query
+    QUESTION_WORDS = {
+        'is', 'are', 'it', 'its', 'this', 'that', 'they', 'them', 'these', 'the', 'a', 'an', 'in', 'still',
+        'stock', 'available', 'sold', 'out', 'of', 'do', 'does', 'you', 'u', 'have', 'price', 'cost', 'costs',
+        'mrp', 'what', 'whats', 'how', 'much', 'will', 'priced', 'your'
+    }
+
+    def __init__(self):
+        # Routing counters: 'fast_path' (template), 'llm', 'degraded' (template because the cascade is down)
+        self.route_counts: Dict[str, int] = {"fast_path": 0, "llm": 0, "degraded": 0}
+        self.lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    # 1. DETERMINISTIC ANSWERS
+    # ---------------------------------------------------------
+    def answer(
+        self,
+        query: str,
+        products: List[ProductContext],
+        brand_name: str,
+        shop_info: Dict[str, Any],
+        last_handle: Optional[str] = None
+    ) -> Optional[str]:
+        # Only unambiguous competitor mentions are refused here; the broader
+        # off-topic triggers ("who is", "news", ...) stay a prompt hint for the model
+        has_direct_match = any(p.match_quality == "direct" for p in products)
+        if BusinessRules.is_competitor_query(query) and not has_direct_match:
+            return BusinessRules.OFF_TOPIC_TEMPLATE.format(brand_name=brand_name)
+
+        # Long, multi-part or medical questions need the model
+        if len(query.split()) > self.MAX_QUERY_WORDS or BusinessRules.is_sensitive_query(query):
+            return None
+
+        wants_contact = BusinessRules.is_contact_query(query)
+        wants_stock = BusinessRules.is_direct_stock_question(query)
+        wants_price = BusinessRules.is_direct_price_question(query)
+
+        # Variant-specific questions need per-variant reasoning from the model
+        if (wants_stock or wants_price) and BusinessRules.mentions_variant(query):
+            return None
+
+        if wants_contact and not (wants_stock or wants_price):
+            return self._contact_answer(brand_name, shop_info)
+
+        if (wants_stock or wants_price) and not wants_contact:
+            product = self._unambiguous_product(query, products, last_handle)
+            if product is None:
+                return None
+            return self._product_facts_answer([product], shop_info, wants_stock, wants_price)
+
+        return None
+
+    def _unambiguous_product(
+        self,
+        query: str,
+        products: List[ProductContext],
+        last_handle: Optional[str]
+    ) -> Optional[ProductContext]:
+        """
+        The single product a stock/price template may speak for: a context follow-up
+        resolved to last_handle, or one direct hit whose title covers every query term.
+        Substring noise ("it" inside "Kit") or several hits go to the model.
+        """
+        direct = [p for p in products if p.match_quality == "direct"]
+        if len(direct) != 1:
+            return None
+        product = direct[0]
+        if last_handle and product.handle == last_handle:
+            return product
+
+        terms = [t for t in re.findall(r"[a-z0-9]+", query.lower()) if t not in self.QUESTION_WORDS]
+        title = re.sub(r"[^a-z0-9]", "", product.title.lower())
+        if terms and all(t in title for t in terms):
+            return product
+        return None
+
+    def _contact_answer(self, brand_name: str, shop_info: Dict[str, Any]) -> Optional[str]:
+        email = shop_info.get('email')
+        phone = shop_info.get('phone')
+        lines = []
+        if email and "Not specified" not in email:
+            lines.append(f"- Email: {email}")
+        if phone and phone != "Not specified":
+            lines.append(f"- Phone: {phone}")
+        if not lines:
+            return None
+        return f"You can reach the {brand_name} support team here:\n" + "\n".join(lines)
+
+    def _format_price(self, product: ProductContext, currency: str) -> str:
+        price = product.price_range.replace("🔥 ON SALE!", "").strip()
+        if price == "Not specified":
+            return "price not listed"
+        sale = " (🔥 on sale)" if "ON SALE" in product.price_range else ""
+        return f"{currency} {price}{sale}"
+
+    def _product_facts_answer(
+        self,
+        products: List[ProductContext],
+        shop_info: Dict[str, Any],
+        include_stock: bool,
+        include_price: bool
+    ) -> str:
+        currency = shop_info.get('currency') or "INR"
+        lines = []
+        for p in products[:self.MAX_LISTED_PRODUCTS]:
+            facts = []
+            if include_stock:
+                facts.append(BusinessRules.get_stock_status(p.variants))
+            if include_price:
+                facts.append(self._format_price(p, currency))
+            lines.append(f"- **{p.title}**: {' · '.join(facts)} - [View Product]({p.url})")
+
+        if len(lines) == 1:
+            return lines[0][2:]
+        return "Here's what I found:\n" + "\n".join(lines)
+
+    # ---------------------------------------------------------
+    # 2. DEGRADED MODE (every model in the cascade unavailable)
+    # ---------------------------------------------------------
+    def degraded_answer(
+        self,
+        query: str,
+        products: List[ProductContext],
+        brand_name: str,
+        shop_info: Dict[str, Any]
+    ) -> Optional[str]:
+        """Best-effort product summary; None when there is nothing useful to show."""
+        if not products:
+            return None
+
+        sorted_products = BusinessRules.sort_products_for_context(products, query)
+        currency = shop_info.get('currency') or "INR"
+        if sorted_products[0].match_quality == "fallback":
+            intro = "I couldn't find an exact match, but these popular products may help:"
+        else:
+            intro = "Here are the products that best match your question:"
+        lines = [
+            f"- **{p.title}**: {self._format_price(p, currency)} · "
+            f"{BusinessRules.get_stock_status(p.variants)} - [View Product]({p.url})"
+            for p in sorted_products[:self.MAX_LISTED_PRODUCTS]
+        ]
+        return intro + "\n" + "\n".join(lines)
+
+    # ---------------------------------------------------------
+    # 3. METRICS
+    # ---------------------------------------------------------
+    def record(self, route: str):
+        with self.lock:
+            self.route_counts[route] = self.route_counts.get(route, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            counts = dict(self.route_counts)
+        total = sum(counts.values())
+        templated = counts.get("fast_path", 0) + counts.get("degraded", 0)
+        return {
+            "requests": total,
+            "routes": counts,
+            "fast_path_share": counts.get("fast_path", 0) / total if total else 0.0,
+            "template_share": templated / total if total else 0.0
+        }
@@ -0,0 +1,155 @@
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+class InteractionLogger:
+    """
+    Background writer for chat interactions.
+    /chat only does a non-blocking put on a bounded queue; a daemon thread
+    flushes batches to rotating gzip'd JSONL files, keeping at most `max_files`
+    of them. When the queue is full the entry is dropped and counted instead of
+    slowing the request down.
+
+    Each line uses the query-log shape read by backend.retrieval_eval:
+    {"request_id", "timestamp", "brand_id", "query", "last_handle", "handles", "match_quality", "model", "route", "latency_ms", ...}
+    """
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        max_file_bytes: int = 50 * 1024 * 1024,
+        max_files: int = 20
+    ):
+        self.log_dir = log_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        # dropped: queue full (request threads); failed: flush errors (writer thread)
+        self.dropped = 0
+        self.failed = 0
+        self.written = 0
+        self._stats_lock = threading.Lock()
+        self._current_path: Optional[str] = None
+        self._current_bytes = 0
+        self._file_index = 0
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="interaction-logger", daemon=True)
+        self._worker.start()
+
+    def log(self, entry: Dict[str, Any]) -> bool:
+        """Non-blocking enqueue. Returns False (and counts a drop) when the queue is full."""
+        try:
+            self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stops the worker after it drains whatever is already queued."""
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queued": self.queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "file": self._current_path
+            }
+
+    # ---------------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+        # Final drain on shutdown
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _rotate_if_needed(self):
+        if self._current_path and self._current_bytes < self.max_file_bytes:
+            return
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        self._file_index += 1
+        self._current_path = os.path.join(
+            self.log_dir, f"interactions-{stamp}-{os.getpid()}-{self._file_index:04d}.jsonl.gz"
+        )
+        self._current_bytes = 0
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """Deletes the oldest rotated files beyond max_files."""
+        files = sorted(glob.glob(os.path.join(self.log_dir, "interactions-*.jsonl.gz")), key=os.path.getmtime)
+        files = [f for f in files if f != self._current_path]
+        for path in files[:max(0, len(files) - (self.max_files - 1))]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠️ Could not remove old interaction log {path}: {e}")
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            self._rotate_if_needed()
+            payload = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in batch)
+            # Each batch is appended as its own gzip member; readers see one continuous JSONL stream
+            with gzip.open(self._current_path, "at", encoding="utf-8") as f:
+                f.write(payload)
+            self._current_bytes = os.path.getsize(self._current_path)
+            with self._stats_lock:
+                self.written += len(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self.failed += len(batch)
+            print(f"⚠️ Interaction log flush failed: {e}")
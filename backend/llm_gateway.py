@@ -1,7 +1,8 @@
 import os
+import time
 import traceback
-from groq import Groq, RateLimitError, APIError
-from typing import List, Dict, Any
+from groq import Groq, RateLimitError, APIError, APIStatusError, APIConnectionError
+from typing import List, Dict, Any, Optional, Tuple
 from .models import ProductContext
 from .business_rules import BusinessRules
 
@@ -20,6 +21,25 @@ class LLMGateway:
             "llama-3.1-8b-instant"
         ]
 
+        # Models that just failed or were rate limited sit out for a cooldown.
+        # {model: monotonic time when it may be tried again}
+        self.model_cooldown_seconds = 20.0
+        self.model_unavailable_until: Dict[str, float] = {}
+
+    BUSY_MESSAGE = "I apologize, but the system is currently busy. Please try again shortly."
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Rate limits, 5xx and connection/timeout errors - the kind a cooldown can fix."""
+        if isinstance(error, (RateLimitError, APIConnectionError)):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code >= 500
+
+    def is_degraded(self) -> bool:
+        """True while every model in the cascade is cooling down after a failure."""
+        now = time.monotonic()
+        return all(self.model_unavailable_until.get(m, 0) > now for m in self.model_cascade)
+
     def generate_response(
         self,
         query: str,
@@ -28,6 +48,18 @@ class LLMGateway:
         brand_name: str,
         shop_info: Dict[str, Any]
     ) -> str:
+        messages = self.build_messages(query, context_products, history, brand_name, shop_info)
+        return self.complete(messages)
+
+    def build_messages(
+        self,
+        query: str,
+        context_products: List[ProductContext],
+        history: List[Dict],
+        brand_name: str,
+        shop_info: Dict[str, Any]
+    ) -> List[Dict]:
+        """Assembles the full chat payload (system prompt + history + query) without calling the LLM."""
 
         # 1. Sort Products
         sorted_products = BusinessRules.sort_products_for_context(
@@ -94,13 +126,13 @@ DETAILS: {p.description[:700]}
         # 5. Off-topic / Competitor Guard
         off_topic_instruction = ""
         if BusinessRules.is_off_topic_query(query):
+            refusal = BusinessRules.OFF_TOPIC_TEMPLATE.format(brand_name=brand_name)
             off_topic_instruction = f"""
 🚨 OFF-TOPIC QUERY DETECTED
 ACTION: Politely refuse.
 
 RESPONSE TEMPLATE:
-"I am the AI assistant for {brand_name} only.
-I cannot provide information about other brands, platforms, or unrelated topics."
+"{refusal}"
 """
 
         # 6. Shop Context
@@ -148,10 +180,19 @@ PRODUCT DATA (Single Source of Truth):
         for msg in history[-4:]:
             messages.append(msg)
         messages.append({"role": "user", "content": query})
+        return messages
+
+    def complete(self, messages: List[Dict]) -> str:
+        response_text, _ = self.try_complete(messages)
+        return response_text or self.BUSY_MESSAGE
 
+    def try_complete(self, messages: List[Dict]) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (response, model used), or (None, None) if every model failed."""
         # 9. LLM Call with Cascade Fallback
         last_error = None
         for model in self.model_cascade:
+            if self.model_unavailable_until.get(model, 0) > time.monotonic():
+                continue
             try:
                 chat_completion = self.client.chat.completions.create(
                     model=model,
@@ -159,12 +200,16 @@ PRODUCT DATA (Single Source of Truth):
                     temperature=0.1,
                     max_tokens=600
                 )
-                return chat_completion.choices[0].message.content
+                self.model_unavailable_until.pop(model, None)
+                return chat_completion.choices[0].message.content, model
             except (RateLimitError, APIError, Exception) as e:
                 last_error = e
+                # Bad requests (4xx, oversized prompt) say nothing about model health
+                if self._is_transient(e):
+                    self.model_unavailable_until[model] = time.monotonic() + self.model_cooldown_seconds
                 continue
 
         if last_error:
             traceback.print_exc()
 
-        return "I apologize, but the system is currently busy. Please try again shortly."
+        return None, None
@@ -3,13 +3,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 import os
+import time
+import uuid
+from datetime import datetime, timezone
 
 load_dotenv() 
 
-from .models import ChatRequest, ChatResponse, SessionStartRequest
+from .models import ChatRequest, ChatResponse, SessionStartRequest, PrefetchRequest
 from .data_engine import MultiTenantDataEngine
 from .session_manager import SessionManager
 from .llm_gateway import LLMGateway
+from .prefetch_manager import PrefetchManager
+from .business_rules import BusinessRules
+from .fast_path import FastPathResponder
+from .interaction_logger import InteractionLogger
 
 app = FastAPI()
 
@@ -26,6 +33,39 @@ app.mount("/frontend", StaticFiles(directory=os.path.join(os.path.dirname(os.pat
 data_engine = MultiTenantDataEngine()
 session_manager = SessionManager()
 llm_gateway = LLMGateway()
+prefetch_manager = PrefetchManager()
+fast_path = FastPathResponder()
+interaction_logger = InteractionLogger(
+    log_dir=os.getenv("INTERACTION_LOG_DIR", "logs"),
+    max_files=int(os.getenv("INTERACTION_LOG_MAX_FILES", "20"))
+)
+
+PREFETCH_MIN_CHARS = 3
+
+def prepare_turn(brand_id: str, query: str, last_handle, history):
+    """Retrieval + prompt assembly. Shared by /chat and the speculative /prefetch path."""
+    # RETRIEVE SHOP INFO
+    shop_info = data_engine.get_shop_details(brand_id)
+
+    # SMART SEARCH
+    relevant_products = data_engine.search_products(brand_id, query, last_handle)
+
+    # LIVE STOCK / PRICE (only when the answer depends on it)
+    if BusinessRules.is_stock_or_price_query(query):
+        relevant_products = data_engine.refresh_inventory(brand_id, relevant_products)
+
+    # PROMPT ASSEMBLY
+    messages = llm_gateway.build_messages(
+        query=query,
+        context_products=relevant_products,
+        history=history,
+        brand_name=brand_id.capitalize(),
+        shop_info=shop_info
+    )
+    return relevant_products, messages
+
+def prefetch_key(message: str, last_handle, turn: int) -> tuple:
+    return (PrefetchManager.normalize(message), last_handle, turn)
 
 @app.post("/start_session")
 async def start_session(request: SessionStartRequest):
@@ -34,8 +74,43 @@ async def start_session(request: SessionStartRequest):
     session_id = session_manager.create_session(request.brand_id)
     return {"session_id": session_id, "message": f"Welcome to {request.brand_id.capitalize()} support!"}
 
+@app.on_event("startup")
+def start_workers():
+    interaction_logger.start()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    prefetch_manager.shutdown()
+    interaction_logger.shutdown()
+
+@app.get("/metrics")
+async def metrics():
+    return {"routing": fast_path.get_stats(), "interaction_log": interaction_logger.get_stats()}
+
+@app.post("/prefetch")
+async def prefetch(request: PrefetchRequest):
+    session = session_manager.get_session(request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session expired or invalid")
+
+    query = request.message.strip()
+    if len(query) < PREFETCH_MIN_CHARS:
+        return {"status": "skipped"}
+
+    brand_id = session['brand_id']
+    last_handle = session_manager.get_context_handle(request.session_id)
+    history = list(session['history'])
+    key = prefetch_key(query, last_handle, session['turn'])
+
+    status = prefetch_manager.schedule(
+        request.session_id, key,
+        lambda: prepare_turn(brand_id, query, last_handle, history)
+    )
+    return {"status": status}
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
+    started = time.perf_counter()
     session = session_manager.get_session(request.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session expired or invalid")
@@ -45,28 +120,59 @@ async def chat(request: ChatRequest):
 
     # 1. RETRIEVE CONTEXT
     last_handle = session_manager.get_context_handle(request.session_id)
-    
-    # 2. RETRIEVE SHOP INFO (New!)
-    shop_info = data_engine.get_shop_details(brand_id)
 
-    # 3. SMART SEARCH
-    relevant_products = data_engine.search_products(brand_id, query, last_handle)
+    # 2. REUSE PREFETCHED WORK (if the shopper sent what we speculated on)
+    prepared = await prefetch_manager.consume(
+        request.session_id, prefetch_key(query, last_handle, session['turn'])
+    )
+
+    # 3. SHOP INFO + SMART SEARCH + PROMPT
+    if prepared is None:
+        prepared = prepare_turn(brand_id, query, last_handle, session['history'])
+    relevant_products, messages = prepared
+    # Prefetch matched on the normalized text - the model must see what was actually sent
+    messages = messages[:-1] + [{"role": "user", "content": query}]
 
     if relevant_products and relevant_products[0].match_quality == "direct":
         session_manager.update_context(request.session_id, relevant_products[0].handle)
 
-    # 4. LLM Generation (Pass shop_info now)
-    response_text = llm_gateway.generate_response(
-        query=query,
-        context_products=relevant_products,
-        history=session['history'],
-        brand_name=brand_id.capitalize(),
-        shop_info=shop_info # <--- PASS THIS
-    )
+    # 4. TEMPLATE FAST PATH -> LLM -> DEGRADED TEMPLATE
+    brand_name = brand_id.capitalize()
+    shop_info = data_engine.get_shop_details(brand_id)
+    response_text = fast_path.answer(query, relevant_products, brand_name, shop_info, last_handle)
+    route = "fast_path"
+    model = None
+
+    if response_text is None and not llm_gateway.is_degraded():
+        response_text, model = llm_gateway.try_complete(messages)
+        route = "llm"
+
+    if response_text is None:
+        response_text = (
+            fast_path.degraded_answer(query, relevant_products, brand_name, shop_info)
+            or llm_gateway.BUSY_MESSAGE
+        )
+        route = "degraded"
+    fast_path.record(route)
 
     session_manager.add_interaction(request.session_id, "user", query)
     session_manager.add_interaction(request.session_id, "assistant", response_text)
 
+    # 5. ANALYTICS LOG (non-blocking; replayable by backend.retrieval_eval)
+    interaction_logger.log({
+        "request_id": str(uuid.uuid4()),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "session_id": request.session_id,
+        "brand_id": brand_id,
+        "query": query,
+        "last_handle": last_handle,
+        "handles": [p.handle for p in relevant_products],
+        "match_quality": relevant_products[0].match_quality if relevant_products else "none",
+        "model": model,
+        "route": route,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+
     return ChatResponse(
         response=response_text,
         related_products=[p.dict() for p in relevant_products]
@@ -8,6 +8,10 @@ class ChatRequest(BaseModel):
     session_id: str
     message: str
 
+class PrefetchRequest(BaseModel):
+    session_id: str
+    message: str
+
 class ChatResponse(BaseModel):
     response: str
     related_products: List[Dict[str, Any]] = []
@@ -21,6 +25,7 @@ class ProductVariant(BaseModel):
     sku: str
 
 class ProductContext(BaseModel):
+    product_id: str = ""  # Shopify product id (live mode only); used for inventory refresh
     handle: str
     title: str
     description: str
@@ -0,0 +1,141 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Callable, Deque, Tuple
+
+class PrefetchManager:
+    """
+    Runs retrieval + prompt assembly speculatively while the shopper is typing.
+    Each session owns a single short-lived slot; /chat consumes it when the final
+    message matches what was prefetched.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        ttl_seconds: float = 30.0,
+        max_per_window: int = 10,
+        window_seconds: float = 10.0,
+        join_timeout: float = 1.5
+    ):
+        # Small fixed pool keeps speculative work from competing with /chat for CPU
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self.join_timeout = join_timeout
+
+        # {session_id: {'key': tuple, 'result': Any, 'created_at': float}}
+        self.slots: Dict[str, Dict[str, Any]] = {}
+        # {session_id: (key, Future)} - at most one in-flight prefetch per session
+        self.pending: Dict[str, Tuple[Tuple, Future]] = {}
+        self.request_log: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        return " ".join(message.lower().split())
+
+    def _is_rate_limited(self, session_id: str, now: float) -> bool:
+        log = self.request_log.setdefault(session_id, deque())
+        while log and now - log[0] > self.window_seconds:
+            log.popleft()
+        if len(log) >= self.max_per_window:
+            return True
+        log.append(now)
+        return False
+
+    def _purge(self, now: float):
+        """Drops expired slots and idle rate-limit logs. Caller holds the lock."""
+        if now - self._last_purge < self.window_seconds:
+            return
+        self._last_purge = now
+        for sid in [s for s, slot in self.slots.items() if now - slot['created_at'] >= self.ttl_seconds]:
+            del self.slots[sid]
+        for sid in [s for s, log in self.request_log.items() if not log or now - log[-1] > self.window_seconds]:
+            del self.request_log[sid]
+
+    def schedule(self, session_id: str, key: Tuple, task: Callable[[], Any]) -> str:
+        """
+        Queues `task` for the session, superseding any older prefetch.
+        Returns one of: 'scheduled', 'cached', 'throttled', 'busy'.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self._purge(now)
+            slot = self.slots.get(session_id)
+            if slot and slot['key'] == key and now - slot['created_at'] < self.ttl_seconds:
+                return "cached"
+
+            in_flight = self.pending.get(session_id)
+            if in_flight and in_flight[0] == key and not in_flight[1].done():
+                return "scheduled"
+
+            if self._is_rate_limited(session_id, now):
+                return "throttled"
+
+            # Cancel the superseded prefetch (no-op if it already started running)
+            if in_flight:
+                in_flight[1].cancel()
+                del self.pending[session_id]
+            self.slots.pop(session_id, None)
+
+            active = sum(1 for _, f in self.pending.values() if not f.done())
+            if active >= self.max_pending:
+                return "busy"
+
+            future = self.executor.submit(task)
+            self.pending[session_id] = (key, future)
+
+        future.add_done_callback(lambda f: self._store(session_id, key, f))
+        return "scheduled"
+
+    def _store(self, session_id: str, key: Tuple, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self.lock:
+            in_flight = self.pending.get(session_id)
+            # Drop results from prefetches superseded while they were running
+            if not in_flight or in_flight[1] is not future:
+                return
+            del self.pending[session_id]
+            self.slots[session_id] = {
+                "key": key,
+                "result": future.result(),
+                "created_at": time.monotonic()
+            }
+
+    async def consume(self, session_id: str, key: Tuple) -> Optional[Any]:
+        """Returns (and clears) the prefetched result if it matches `key` and is still fresh."""
+        with self.lock:
+            slot = self.slots.pop(session_id, None)
+            in_flight = self.pending.pop(session_id, None)
+
+        if slot and slot['key'] == key and time.monotonic() - slot['created_at'] < self.ttl_seconds:
+            return slot['result']
+
+        # The matching prefetch may still be running - joining it is cheaper than starting over.
+        # Awaited so other requests keep being served while we wait.
+        if in_flight and in_flight[0] == key:
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(in_flight[1]), timeout=self.join_timeout)
+            except Exception:
+                return None
+        if in_flight:
+            in_flight[1].cancel()
+        return None
+
+    def discard(self, session_id: str):
+        with self.lock:
+            self.slots.pop(session_id, None)
+            in_flight = self.pending.pop(session_id, None)
+        if in_flight:
+            in_flight[1].cancel()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
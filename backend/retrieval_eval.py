@@ -0,0 +1,322 @@
+"""
+Offline retrieval evaluation / replay harness.
+
+Replays a query log (JSONL or the gzip'd interaction logs in logs/) or a labeled
+query -> handles file (JSONL or CSV) through MultiTenantDataEngine.search_products
+and reports recall@k, MRR, fallback rate and per-query latency per brand.
+Never touches the LLM or the live Shopify API. Catalogs come from the CSV
+exports (searched exactly as CSV-mode brands are in production) and/or a saved
+product snapshot (searched through the live-mode path). Each brand's report
+states which path it was evaluated through.
+
+Usage:
+    python -m backend.retrieval_eval queries.jsonl
+    python -m backend.retrieval_eval queries.jsonl --save-baseline eval_baseline.json
+    python -m backend.retrieval_eval queries.jsonl --baseline eval_baseline.json --config tuning.json
+    python -m backend.retrieval_eval queries.jsonl --snapshot catalog.json
+    python -m backend.retrieval_eval --self-check
+
+Input line fields:
+    brand_id (or brand), query (or message), optional last_handle (conversation context),
+    expected_handles (labels) - falls back to logged `handles` for replayed logs,
+    but only when the logged match_quality was "direct".
+CSV files use the same column names, with handles separated by ';'.
+
+The optional --config JSON overrides search tuning on the engine, e.g.
+    {"TITLE_WEIGHT": 8, "TAG_WEIGHT": 6, "SYNONYMS": {...}, "STOP_WORDS": [...]}
+The optional --snapshot JSON is {brand_id: [ProductContext dicts]}; snapshot
+brands take precedence over their CSV export.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+from .data_engine import MultiTenantDataEngine
+from .models import ProductContext, ProductVariant
+
+TUNABLE_FIELDS = {"SYNONYMS", "STOP_WORDS", "CONTEXT_INTENTS", "PROMO_INTENTS", "TITLE_WEIGHT", "TAG_WEIGHT"}
+
+_worker_engine: Optional[MultiTenantDataEngine] = None
+
+
+# ---------------------------------------------------------
+# 1. LOADING
+# ---------------------------------------------------------
+def _split_handles(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(h).strip() for h in value if str(h).strip()]
+    return [h.strip() for h in str(value).split(";") if h.strip()]
+
+def _to_case(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    brand_id = row.get("brand_id") or row.get("brand")
+    query = row.get("query") or row.get("message")
+    if not brand_id or not query:
+        return None
+    expected = _split_handles(row.get("expected_handles"))
+    # Logged results are only trustworthy labels when they were real matches
+    if not expected and row.get("match_quality") == "direct":
+        expected = _split_handles(row.get("handles"))
+    return {
+        "brand_id": str(brand_id),
+        "query": str(query),
+        "last_handle": row.get("last_handle") or None,
+        "expected": expected
+    }
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        opener = gzip.open if path.lower().endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    cases = [c for c in (_to_case(r) for r in rows) if c]
+    for i, case in enumerate(cases):
+        case["index"] = i
+    return cases
+
+
+def load_catalog_snapshot(path: str) -> Dict[str, List[ProductContext]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {brand: [ProductContext(**p) for p in items] for brand, items in data.items()}
+
+
+# ---------------------------------------------------------
+# 2. WORKERS (one engine per process, built once)
+# ---------------------------------------------------------
+def apply_overrides(engine: MultiTenantDataEngine, overrides: Dict[str, Any]):
+    for field, value in overrides.items():
+        if field not in TUNABLE_FIELDS:
+            raise ValueError(f"Unknown tuning field: {field}")
+        if field in {"STOP_WORDS", "CONTEXT_INTENTS", "PROMO_INTENTS"}:
+            value = set(value)
+        setattr(engine, field, value)
+
+def build_engine(overrides: Dict[str, Any], snapshot_path: Optional[str] = None) -> MultiTenantDataEngine:
+    engine = MultiTenantDataEngine(use_live_api=False)
+    if snapshot_path:
+        engine.live_cache.update(load_catalog_snapshot(snapshot_path))
+    apply_overrides(engine, overrides)
+    return engine
+
+def _init_worker(overrides: Dict[str, Any], snapshot_path: Optional[str]):
+    global _worker_engine
+    _worker_engine = build_engine(overrides, snapshot_path)
+
+def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    products = _worker_engine.search_products(case["brand_id"], case["query"], case["last_handle"])
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {
+        "index": case["index"],
+        "brand_id": case["brand_id"],
+        "query": case["query"],
+        "expected": case["expected"],
+        "handles": [p.handle for p in products],
+        "match_quality": products[0].match_quality if products else "none",
+        "search_path": "live" if case["brand_id"] in _worker_engine.live_cache else "csv",
+        "latency_ms": latency_ms
+    }
+
+
+# ---------------------------------------------------------
+# 3. METRICS
+# ---------------------------------------------------------
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+SCORED_MATCHES = {"direct", "catalog"}
+
+def summarize(results: List[Dict[str, Any]], k: int) -> Dict[str, Any]:
+    labeled = [r for r in results if r["expected"]]
+    recalls, reciprocal_ranks = [], []
+    fallback_hits = 0
+    for r in labeled:
+        expected = set(r["expected"])
+        hit = any(h in expected for h in r["handles"][:k])
+        # A label that shows up in the featured fallback list is luck, not retrieval
+        if r["match_quality"] not in SCORED_MATCHES:
+            fallback_hits += int(hit)
+            recalls.append(0.0)
+            reciprocal_ranks.append(0.0)
+            continue
+        top_k = r["handles"][:k]
+        recalls.append(len(expected.intersection(top_k)) / len(expected))
+        rank = next((i + 1 for i, h in enumerate(r["handles"]) if h in expected), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    latencies = [r["latency_ms"] for r in results]
+    fallbacks = sum(1 for r in results if r["match_quality"] in ("fallback", "none"))
+    return {
+        "queries": len(results),
+        "labeled": len(labeled),
+        f"recall@{k}": statistics.mean(recalls) if recalls else 0.0,
+        "mrr": statistics.mean(reciprocal_ranks) if reciprocal_ranks else 0.0,
+        "fallback_rate": fallbacks / len(results) if results else 0.0,
+        "fallback_hits": fallback_hits,
+        "latency_ms_mean": statistics.mean(latencies) if latencies else 0.0,
+        "latency_ms_p50": _percentile(latencies, 50),
+        "latency_ms_p95": _percentile(latencies, 95),
+        "latency_ms_max": max(latencies) if latencies else 0.0
+    }
+
+def build_report(results: List[Dict[str, Any]], k: int) -> Dict[str, Any]:
+    brands = sorted({r["brand_id"] for r in results})
+    return {
+        "k": k,
+        "overall": summarize(results, k),
+        "brands": {
+            b: {
+                "search_path": next(r["search_path"] for r in results if r["brand_id"] == b),
+                **summarize([r for r in results if r["brand_id"] == b], k)
+            }
+            for b in brands
+        },
+        "queries": results
+    }
+
+def diff_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Metric deltas (current - baseline) for overall and each brand present in both."""
+    diffs = {}
+    scopes = [("overall", current["overall"], baseline.get("overall", {}))]
+    for brand, metrics in current["brands"].items():
+        if brand in baseline.get("brands", {}):
+            scopes.append((brand, metrics, baseline["brands"][brand]))
+    for scope, now, before in scopes:
+        diffs[scope] = {
+            name: value - before[name]
+            for name, value in now.items()
+            if isinstance(value, (int, float)) and isinstance(before.get(name), (int, float))
+        }
+    return diffs
+
+
+# ---------------------------------------------------------
+# 4. SELF-CHECK
+# ---------------------------------------------------------
+def check_weight_sensitivity() -> bool:
+    """
+    Guards against tuning knobs that silently do nothing: on both the live and
+    the CSV search paths, a title hit and a tag hit must swap order when
+    TITLE_WEIGHT and TAG_WEIGHT are swapped.
+    """
+    engine = MultiTenantDataEngine(use_live_api=False)
+    rows = [("tag-hit", "Zeta Cream", "argan"), ("title-hit", "Argan Oil", "zeta")]
+
+    engine.live_cache["check-live"] = [
+        ProductContext(handle=h, title=t, description="", tags=[tag], vendor="", url="",
+                       variants=[ProductVariant(id=h, title="", price="0", inventory_qty=1,
+                                                inventory_policy="deny", sku="")])
+        for h, t, tag in rows
+    ]
+    engine.brand_datasets["check-csv"] = pd.DataFrame(
+        [{"Handle": h, "Title": t, "Tags": tag, "Vendor": "", "Body (HTML)": "", "Variant Price": "0"} for h, t, tag in rows]
+    )
+    engine.column_maps["check-csv"] = {"inventory": None, "price": "Variant Price", "body": "Body (HTML)", "seo": None}
+    engine.brand_metadata["check-csv"] = {"domain": "example.com"}
+
+    ok = True
+    for brand in ("check-live", "check-csv"):
+        engine.TITLE_WEIGHT, engine.TAG_WEIGHT = 10, 1
+        title_first = [p.handle for p in engine.search_products(brand, "argan")]
+        engine.TITLE_WEIGHT, engine.TAG_WEIGHT = 1, 10
+        tag_first = [p.handle for p in engine.search_products(brand, "argan")]
+        passed = title_first[:1] == ["title-hit"] and tag_first[:1] == ["tag-hit"]
+        print(f"{'✅' if passed else '❌'} {brand}: weights 10/1 -> {title_first}, 1/10 -> {tag_first}")
+        ok = ok and passed
+    return ok
+
+
+# ---------------------------------------------------------
+# 5. RUNNER
+# ---------------------------------------------------------
+def evaluate(cases: List[Dict[str, Any]], k: int = 4, workers: Optional[int] = None,
+             overrides: Optional[Dict[str, Any]] = None, snapshot_path: Optional[str] = None) -> Dict[str, Any]:
+    overrides = overrides or {}
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(cases) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(overrides, snapshot_path)) as pool:
+        results = list(pool.map(_run_case, cases, chunksize=chunksize))
+    results.sort(key=lambda r: r["index"])
+    return build_report(results, k)
+
+def _print_report(report: Dict[str, Any], diffs: Optional[Dict[str, Dict[str, float]]] = None):
+    for scope, metrics in [("overall", report["overall"])] + list(report["brands"].items()):
+        print(f"📊 {scope}")
+        for name, value in metrics.items():
+            line = f"   {name:<16} {value:>10.4f}" if isinstance(value, float) else f"   {name:<16} {value:>10}"
+            if diffs and scope in diffs and name in diffs[scope]:
+                line += f"   ({diffs[scope][name]:+.4f} vs baseline)"
+            print(line)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline retrieval evaluation for search_products.")
+    parser.add_argument("queries", nargs="?", help="Query log / labeled file (.jsonl, .jsonl.gz or .csv)")
+    parser.add_argument("-k", type=int, default=4, help="Cutoff for recall@k")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--config", help="JSON file with search tuning overrides")
+    parser.add_argument("--snapshot", help="JSON product snapshot {brand_id: [products]} to search instead of CSV")
+    parser.add_argument("--baseline", help="Saved report to diff against")
+    parser.add_argument("--save-baseline", help="Write this run's report to the given path")
+    parser.add_argument("--self-check", action="store_true", help="Verify the tuning weights affect ranking, then exit")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        return 0 if check_weight_sensitivity() else 1
+    if not args.queries:
+        parser.error("queries is required unless --self-check is given")
+
+    cases = load_cases(args.queries)
+    if not cases:
+        print(f"❌ No usable queries found in {args.queries}")
+        return 1
+
+    overrides = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            overrides = json.load(f)
+
+    started = time.perf_counter()
+    report = evaluate(cases, k=args.k, workers=args.workers, overrides=overrides, snapshot_path=args.snapshot)
+    print(f"✅ Replayed {len(cases)} queries in {time.perf_counter() - started:.2f}s")
+
+    diffs = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            diffs = diff_reports(report, json.load(f))
+    _print_report(report, diffs)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,6 +11,7 @@ class SessionManager:
         self.sessions[session_id] = {
             "brand_id": brand_id,
             "history": [], 
+            "turn": 0, # Bumped on every history write; history length alone plateaus at 10
             "last_product_context": None,
             "user_attributes": {} # New: Stores 'skin_type', 'concern', etc.
         }
@@ -26,6 +27,7 @@ class SessionManager:
     def add_interaction(self, session_id: str, role: str, message: str):
         if session_id in self.sessions:
             self.sessions[session_id]["history"].append({"role": role, "content": message})
+            self.sessions[session_id]["turn"] += 1
             # Keep history optimized (Last 10 turns)
             if len(self.sessions[session_id]["history"]) > 10:
                 self.sessions[session_id]["history"].pop(0)
@@ -1,16 +1,43 @@
+import time
+import threading
 import requests
-from typing import List, Dict, Optional, Any
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import List, Dict, Optional, Any, Tuple
 from .models import ProductContext, ProductVariant
 
 class ShopifyClient:
-    def __init__(self, domain: str, access_token: str):
+    def __init__(
+        self,
+        domain: str,
+        access_token: str,
+        base_url: Optional[str] = None,
+        inventory_ttl: float = 20.0,
+        inventory_deadline: float = 0.8
+    ):
         self.domain = domain.replace("https://", "").replace("/", "")
-        self.base_url = f"https://{self.domain}/admin/api/2024-01"
+        # base_url override lets the client run against a local stub server
+        self.base_url = base_url.rstrip("/") if base_url else f"https://{self.domain}/admin/api/2024-01"
         self.headers = {
             "X-Shopify-Access-Token": access_token,
             "Content-Type": "application/json"
         }
 
+        # Pooled keep-alive connection shared by sync and on-demand lookups
+        self.http = requests.Session()
+        self.http.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        # Live inventory: {variant_id: (fetched_at, {'inventory_qty', 'inventory_policy', 'price', 'compare_at_price'})}
+        self.inventory_ttl = inventory_ttl
+        self.inventory_deadline = inventory_deadline
+        self._inventory_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inventory_inflight: Dict[str, Future] = {}
+        self._inventory_lock = threading.Lock()
+        self._inventory_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="inventory")
+
     def fetch_shop_details(self) -> Dict[str, Any]:
         """
         Fetches global shop metadata (Email, Domain, Currency, Name).
@@ -18,7 +45,7 @@ class ShopifyClient:
         """
         try:
             url = f"{self.base_url}/shop.json"
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url)
             if response.status_code == 200:
                 shop = response.json().get('shop', {})
                 return {
@@ -40,7 +67,7 @@ class ShopifyClient:
         try:
             while url:
                 # print(f"🔄 Fetching page from Shopify ({self.domain})...")
-                response = requests.get(url, headers=self.headers)
+                response = self.http.get(url)
                 if response.status_code != 200:
                     print(f"❌ Shopify API Error: {response.status_code} - {response.text}")
                     break
@@ -63,6 +90,132 @@ class ShopifyClient:
             print(f"❌ Shopify Sync Failed: {e}")
             return []
 
+    # ---------------------------------------------------------
+    # ON-DEMAND INVENTORY / PRICE REFRESH
+    # ---------------------------------------------------------
+    def _variant_state(self, v: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "inventory_qty": v.get('inventory_quantity', 0),
+            "inventory_policy": v.get('inventory_policy', 'deny'),
+            "price": float(v.get('price') or 0),
+            "compare_at_price": float(v.get('compare_at_price') or 0)
+        }
+
+    def _fetch_products_inventory(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """One REST call for all requested products. Returns {variant_id: state}."""
+        url = f"{self.base_url}/products.json"
+        params = {"ids": ",".join(product_ids), "fields": "id,variants", "limit": len(product_ids)}
+        response = self.http.get(url, params=params, timeout=(1.0, self.inventory_deadline + 1.0))
+        response.raise_for_status()
+        return {
+            str(v['id']): self._variant_state(v)
+            for item in response.json().get('products', [])
+            for v in item.get('variants', [])
+        }
+
+    def _on_inventory_fetched(self, variant_ids: List[str], future: Future):
+        with self._inventory_lock:
+            for vid in variant_ids:
+                if self._inventory_inflight.get(vid) is future:
+                    del self._inventory_inflight[vid]
+            if future.cancelled() or future.exception() is not None:
+                return
+            fetched_at = time.monotonic()
+            for vid, state in future.result().items():
+                self._inventory_cache[vid] = (fetched_at, state)
+
+    def get_live_variants(self, products: List[ProductContext], deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the freshest known state for each variant of `products`.
+        Fresh cache hits are served directly; every product with a stale variant is
+        fetched in a single batched call, and variants already being fetched by a
+        concurrent lookup share that request. Anything not back before the deadline
+        falls back to whatever (possibly stale) value is cached.
+        """
+        deadline = self.inventory_deadline if deadline is None else deadline
+        now = time.monotonic()
+        live: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, Future] = {}
+        to_fetch: List[ProductContext] = []
+
+        with self._inventory_lock:
+            for p in products:
+                needs_fetch = False
+                for v in p.variants:
+                    cached = self._inventory_cache.get(v.id)
+                    if cached and now - cached[0] < self.inventory_ttl:
+                        live[v.id] = cached[1]
+                    elif v.id in self._inventory_inflight:
+                        waiting[v.id] = self._inventory_inflight[v.id]
+                    else:
+                        needs_fetch = True
+                if needs_fetch and p.product_id:
+                    to_fetch.append(p)
+
+            if to_fetch:
+                batch_ids = [v.id for p in to_fetch for v in p.variants if v.id not in live]
+                future = self._inventory_pool.submit(
+                    self._fetch_products_inventory, [p.product_id for p in to_fetch]
+                )
+                for vid in batch_ids:
+                    self._inventory_inflight[vid] = future
+                    waiting[vid] = future
+                future.add_done_callback(lambda f, ids=batch_ids: self._on_inventory_fetched(ids, f))
+
+        if waiting:
+            wait(set(waiting.values()), timeout=deadline)
+
+        with self._inventory_lock:
+            for vid, future in waiting.items():
+                if future.done() and not future.cancelled() and future.exception() is None and vid in future.result():
+                    live[vid] = future.result()[vid]
+                elif vid in self._inventory_cache:
+                    live[vid] = self._inventory_cache[vid][1]
+        return live
+
+    def refresh_products(self, products: List[ProductContext], deadline: Optional[float] = None) -> List[ProductContext]:
+        """
+        Returns copies of `products` with live stock and price. A product is only
+        updated when every one of its variants has live data, so price ranges never
+        mix fresh and startup values.
+        """
+        live = self.get_live_variants(products, deadline)
+        if not live:
+            return products
+
+        refreshed = []
+        for p in products:
+            if not p.variants or any(v.id not in live for v in p.variants):
+                refreshed.append(p)
+                continue
+            variants = []
+            prices = []
+            compare_prices = []
+            for v in p.variants:
+                state = live[v.id]
+                prices.append(state['price'])
+                if state['compare_at_price'] > state['price']: compare_prices.append(state['compare_at_price'])
+                variants.append(v.copy(update={
+                    "inventory_qty": state['inventory_qty'],
+                    "inventory_policy": state['inventory_policy'],
+                    "price": str(int(state['price']))
+                }))
+            refreshed.append(p.copy(update={
+                "variants": variants,
+                "price_range": self._format_price_range(prices, compare_prices)
+            }))
+        return refreshed
+
+    def _format_price_range(self, prices: List[float], compare_prices: List[float]) -> str:
+        if prices:
+            min_p, max_p = min(prices), max(prices)
+            price_str = f"{int(min_p)}" if min_p == max_p else f"{int(min_p)} - {int(max_p)}"
+        else: price_str = "Not specified"
+
+        is_on_sale = any(c > p for c, p in zip(compare_prices, prices)) if compare_prices else False
+        sale_tag = "🔥 ON SALE! " if is_on_sale else ""
+        return f"{sale_tag}{price_str}"
+
     def _clean_html(self, raw_html: str) -> str:
         from bs4 import BeautifulSoup
         if not raw_html: return ""
@@ -91,16 +244,9 @@ class ShopifyClient:
                 sku=str(v.get('sku') or "")
             ))
 
-        if prices:
-            min_p, max_p = min(prices), max(prices)
-            price_str = f"{int(min_p)}" if min_p == max_p else f"{int(min_p)} - {int(max_p)}"
-        else: price_str = "Not specified"
-        
-        is_on_sale = any(c > p for c, p in zip(compare_prices, prices)) if compare_prices else False
-        sale_tag = "🔥 ON SALE! " if is_on_sale else ""
-        
         handle = item.get('handle', '') or "unknown"
         return ProductContext(
+            product_id=str(item.get('id') or ""),
             handle=handle,
             title=str(item.get('title') or ""),
             description=self._clean_html(item.get('body_html', '')),
@@ -108,6 +254,6 @@ class ShopifyClient:
             vendor=str(item.get('vendor', '')),
             variants=variants,
             url=f"https://{self.domain}/products/{handle}",
-            price_range=f"{sale_tag}{price_str}", 
+            price_range=self._format_price_range(prices, compare_prices), 
             ingredients="Not specified" 
         )
@@ -0,0 +1,162 @@
+"""
+Minimal local stand-in for the Shopify Admin REST API, plus a check that drives
+ShopifyClient's on-demand inventory refresher against it.
+
+Usage:
+    python -m backend.shopify_stub            # run the TTL / dedupe / deadline checks
+    python -m backend.shopify_stub --serve    # just serve the stub on localhost:8765
+
+Only the endpoint the refresher uses is implemented:
+    GET /products.json?ids=1,2&fields=id,variants
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any
+from urllib.parse import urlparse, parse_qs
+
+from .models import ProductContext, ProductVariant
+from .shopify_client import ShopifyClient
+
+
+class StubShopify:
+    """In-memory catalog served over HTTP, with a configurable response delay and a request log."""
+
+    def __init__(self, catalog: Dict[str, List[Dict[str, Any]]], delay: float = 0.0, port: int = 0):
+        self.catalog = catalog  # {product_id: [variant dicts in Shopify REST shape]}
+        self.delay = delay
+        self.requests: List[str] = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                parsed = urlparse(self.path)
+                if parsed.path.rstrip("/").endswith("/products.json"):
+                    ids = parse_qs(parsed.query).get("ids", [""])[0].split(",")
+                    body = {"products": [
+                        {"id": int(pid), "variants": stub.catalog[pid]} for pid in ids if pid in stub.catalog
+                    ]}
+                    status = 200
+                else:
+                    body, status = {"errors": "Not Found"}, 404
+                time.sleep(stub.delay)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/admin/api/2024-01"
+
+    def start(self) -> "StubShopify":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------------------------------------------------
+# CHECKS
+# ---------------------------------------------------------
+def _sample_catalog(qty: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+    """Product 1 has 12 variants (on sale), product 2 has one."""
+    return {
+        "1": [{"id": 100 + i, "inventory_quantity": qty, "inventory_policy": "deny",
+               "price": "499.00", "compare_at_price": "599.00"} for i in range(12)],
+        "2": [{"id": 200, "inventory_quantity": 0, "inventory_policy": "continue",
+               "price": "250.00", "compare_at_price": None}]
+    }
+
+def _startup_products() -> List[ProductContext]:
+    """The same products as they looked at startup sync (stale stock and price)."""
+    def variant(vid: int) -> ProductVariant:
+        return ProductVariant(id=str(vid), title="", price="450", inventory_qty=0, inventory_policy="deny", sku="")
+    return [
+        ProductContext(product_id="1", handle="rose-serum", title="Rose Serum", description="", tags=[],
+                       vendor="", url="", price_range="450", variants=[variant(100 + i) for i in range(12)]),
+        ProductContext(product_id="2", handle="clay-mask", title="Clay Mask", description="", tags=[],
+                       vendor="", url="", price_range="450", variants=[variant(200)])
+    ]
+
+def run_checks() -> bool:
+    results = []
+
+    def check(name: str, passed: bool, detail: str = ""):
+        results.append(passed)
+        print(f"{'✅' if passed else '❌'} {name}{': ' + detail if detail else ''}")
+
+    # 1. Batched fetch + TTL cache
+    stub = StubShopify(_sample_catalog(), delay=0.3).start()
+    client = ShopifyClient("stub.myshopify.com", "token", base_url=stub.base_url, inventory_ttl=1.0, inventory_deadline=1.0)
+    refreshed = client.refresh_products(_startup_products())
+    check("one batched call for both products", len(stub.requests) == 1, f"{len(stub.requests)} request(s)")
+    check("all 12 variants refreshed", [v.inventory_qty for v in refreshed[0].variants] == [7] * 12)
+    check("price range rebuilt from live data", refreshed[0].price_range == "🔥 ON SALE! 499", refreshed[0].price_range)
+
+    client.refresh_products(_startup_products())
+    check("fresh TTL cache hit makes no request", len(stub.requests) == 1, f"{len(stub.requests)} request(s)")
+    time.sleep(1.1)
+    client.refresh_products(_startup_products())
+    check("expired TTL refetches", len(stub.requests) == 2, f"{len(stub.requests)} request(s)")
+    stub.stop()
+
+    # 2. Concurrent lookups for the same variants share one request
+    stub = StubShopify(_sample_catalog(), delay=0.3).start()
+    client = ShopifyClient("stub.myshopify.com", "token", base_url=stub.base_url, inventory_deadline=1.0)
+    threads = [threading.Thread(target=client.refresh_products, args=(_startup_products(),)) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    check("5 concurrent lookups deduplicated", len(stub.requests) == 1, f"{len(stub.requests)} request(s)")
+    stub.stop()
+
+    # 3. Hard deadline falls back to cached values
+    stub = StubShopify(_sample_catalog(qty=3), delay=0.0).start()
+    client = ShopifyClient("stub.myshopify.com", "token", base_url=stub.base_url, inventory_ttl=0.0, inventory_deadline=0.5)
+    client.refresh_products(_startup_products())  # warm the cache with qty=3
+    stub.catalog = _sample_catalog(qty=9)
+    stub.delay = 2.0
+    started = time.monotonic()
+    refreshed = client.refresh_products(_startup_products())
+    elapsed = time.monotonic() - started
+    check("deadline respected", elapsed < 0.8, f"{elapsed:.2f}s")
+    check("stale cached values used after deadline", refreshed[0].variants[0].inventory_qty == 3)
+
+    client_cold = ShopifyClient("stub.myshopify.com", "token", base_url=stub.base_url, inventory_deadline=0.3)
+    untouched = client_cold.refresh_products(_startup_products())
+    check("no cache + deadline keeps startup data", untouched[0].price_range == "450")
+    stub.stop()
+
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Shopify stub for the inventory refresher.")
+    parser.add_argument("--serve", action="store_true", help="Serve the sample catalog until interrupted")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        stub = StubShopify(_sample_catalog(), port=args.port)
+        print(f"🔌 Stub Shopify listening on {stub.base_url}")
+        stub.server.serve_forever()
+        return 0
+    return 0 if run_checks() else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,6 +8,8 @@
   let sessionId = null;
   let isOpen = false;
   let isLoaded = false;
+  let prefetchTimer = null;
+  const PREFETCH_DEBOUNCE_MS = 350;
 
   // ===== Inject Styles =====
   const style = document.createElement("style");
@@ -356,6 +358,7 @@
   document.getElementById("cw-input").addEventListener("keypress", function (e) {
     if (e.key === "Enter") sendMessage();
   });
+  document.getElementById("cw-input").addEventListener("input", schedulePrefetch);
 
   function toggleChat() {
     isOpen = !isOpen;
@@ -382,10 +385,25 @@
     }
   }
 
+  // Warms up retrieval on the server while the shopper is still typing
+  function schedulePrefetch() {
+    clearTimeout(prefetchTimer);
+    prefetchTimer = setTimeout(function () {
+      const message = document.getElementById("cw-input").value.trim();
+      if (message.length < 3 || !sessionId) return;
+      fetch(`${API_URL}/prefetch`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ session_id: sessionId, message: message }),
+      }).catch(function () {});
+    }, PREFETCH_DEBOUNCE_MS);
+  }
+
   async function sendMessage() {
     const input = document.getElementById("cw-input");
     const message = input.value.trim();
     if (!message || !sessionId) return;
+    clearTimeout(prefetchTimer);
 
     addMessage("user", message);
     input.value = "";